@@ -1,66 +1,121 @@
+import csv
+import functools
+import hashlib
+import io
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import ccxt
+import diskcache
+import orjson
 import pandas as pd
 import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit_autorefresh import st_autorefresh
+from websockets.sync.client import connect as ws_connect
 
 TITLE = "Hyperliquid Big Trader Monitor"
-
-
-def _utc_ms(dt: datetime) -> int:
-    return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
-
-
-def _safe_float(value: Any) -> float:
-    try:
-        return float(value)
-    except Exception:
-        return float("nan")
-
-
-def _public_info(exchange: ccxt.Exchange, payload: Dict[str, Any]) -> Any:
-    if hasattr(exchange, "public_post_info"):
-        return exchange.public_post_info(payload)
-    return exchange.request("info", "public", "POST", payload)
-
-
-@st.cache_data(ttl=30)
-def fetch_recent_fills(
-    address: str, start_ms: int, end_ms: int, aggregate_by_time: bool
-) -> List[Dict[str, Any]]:
-    exchange = ccxt.hyperliquid({"enableRateLimit": True})
-    payload = {
-        "type": "userFillsByTime",
-        "user": address,
-        "startTime": start_ms,
-        "endTime": end_ms,
-        "aggregateByTime": aggregate_by_time,
-    }
-    return _public_info(exchange, payload)
-
-
-@st.cache_data(ttl=30)
-def fetch_positions_single(address: str) -> Dict[str, Any]:
-    exchange = ccxt.hyperliquid({"enableRateLimit": True})
-    payload = {
-        "type": "clearinghouseState",
-        "user": address,
-    }
-    return _public_info(exchange, payload)
-
-
-st.set_page_config(page_title=TITLE, layout="wide")
-
-st.title(TITLE)
-
-st.markdown(
-    "Read-only dashboard for recent fills (last 24 hours) and active positions of large traders."
-)
-
-st.markdown(
-    """
+MAX_FETCH_WORKERS = 16
+SOFT_TTL_SECONDS = 30
+HARD_TTL_SECONDS = 300
+DISK_CACHE_DIR = ".hl_cache"
+# Hyperliquid allows 1200 request weight per minute per IP; leave headroom.
+# The limiter is shared by every session, so this is a deployment setting.
+WEIGHT_BUDGET = 1000
+RATE_WINDOW_SECONDS = 60
+MAX_BACKOFF_LEVEL = 3
+HL_WS_URL = "wss://api.hyperliquid.xyz/ws"
+# Hyperliquid caps the number of distinct users with websocket subscriptions per IP.
+MAX_WS_USERS = 10
+WS_STALE_SECONDS = 60
+WS_PING_SECONDS = 30
+PREVIEW_ROWS = 50
+# userFillsByTime returns at most 2000 fills per response; the UI caps there too.
+MAX_FILLS_RETAINED = 2000
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+FILL_FIELDS = [
+    "time",
+    "timestamp",
+    "coin",
+    "side",
+    "dir",
+    "px",
+    "sz",
+    "closedPnl",
+    "fee",
+    "liquidation",
+]
+POSITION_FIELDS = [
+    "coin",
+    "szi",
+    "entryPx",
+    "positionValue",
+    "unrealizedPnl",
+    "returnOnEquity",
+    "liquidationPx",
+    "marginUsed",
+    "leverage.type",
+    "leverage.value",
+]
+FILLS_COLUMNS = [
+    "time",
+    "label",
+    "trader",
+    "coin",
+    "side",
+    "dir",
+    "price",
+    "size",
+    "notional",
+    "closed_pnl",
+    "fee",
+    "liquidation",
+]
+DEFAULT_FILLS_COLUMNS = ["time", "label", "coin", "side", "price", "size", "notional"]
+POSITIONS_COLUMNS = [
+    "label",
+    "trader",
+    "coin",
+    "size",
+    "entry_px",
+    "position_value",
+    "unrealized_pnl",
+    "return_on_equity",
+    "liquidation_px",
+    "margin_used",
+    "leverage_type",
+    "leverage_value",
+]
+DEFAULT_POSITIONS_COLUMNS = [
+    "label",
+    "coin",
+    "size",
+    "entry_px",
+    "position_value",
+    "unrealized_pnl",
+    "leverage_value",
+]
+APP_CSS = """
 <style>
     :root {
         --bg: #0b0f14;
@@ -127,16 +182,602 @@ st.markdown(
         font-size: 1.3rem;
         font-weight: 600;
     }
-    [data-testid="stDataFrame"] {
-        border: 1px solid var(--border);
-        border-radius: 12px;
-        overflow: hidden;
-    }
 </style>
-""",
-    unsafe_allow_html=True,
+"""
+
+
+def _utc_ms(dt: datetime) -> int:
+    return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _numeric(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, errors="coerce")
+
+
+def _arrow_frame(data: Any) -> pd.DataFrame:
+    # Arrow-backed dtypes keep string-heavy frames compact in memory and in the
+    # per-session frame memo; the grid still receives them as JSON.
+    # convert_integer=False keeps price/size columns double even when a refresh
+    # happens to contain only whole numbers.
+    return pd.DataFrame(data).convert_dtypes(
+        dtype_backend="pyarrow", convert_integer=False
+    )
+
+
+def _expand_labels(frame: pd.DataFrame) -> pd.DataFrame:
+    # One row per label when the same wallet is tracked under several names.
+    frame = frame.explode("label", ignore_index=True)
+    frame["label"] = frame["label"].fillna(frame["trader"])
+    return frame
+
+
+def _build_fills_df(
+    raw_fills: List[Dict[str, Any]],
+    traders: List[str],
+    labels_by_address: Dict[str, List[str]],
+) -> pd.DataFrame:
+    raw = pd.DataFrame.from_records(raw_fills).reindex(columns=FILL_FIELDS)
+    trader = pd.Series(traders, index=raw.index)
+    price = _numeric(raw["px"])
+    size = _numeric(raw["sz"])
+    # ccxt may hand back integers as strings, so coerce before treating them as epoch ms.
+    ts_ms = _numeric(raw["time"].fillna(raw["timestamp"]))
+    fills_df = pd.DataFrame(
+        {
+            "time": pd.to_datetime(ts_ms, unit="ms", utc=True, errors="coerce"),
+            "label": trader.map(labels_by_address),
+            "trader": trader,
+            "coin": raw["coin"],
+            "side": raw["side"],
+            "dir": raw["dir"],
+            "price": price,
+            "size": size,
+            "notional": price * size,
+            "closed_pnl": _numeric(raw["closedPnl"]),
+            "fee": _numeric(raw["fee"]),
+            "liquidation": raw["liquidation"],
+        }
+    )
+    return _arrow_frame(_expand_labels(fills_df))
+
+
+def _build_positions_df(
+    states: List[Tuple[str, Dict[str, Any]]],
+    labels_by_address: Dict[str, List[str]],
+) -> pd.DataFrame:
+    raw_positions: List[Dict[str, Any]] = []
+    traders: List[str] = []
+    for addr, state in states:
+        positions = [
+            ap.get("position") or {} for ap in state.get("assetPositions") or []
+        ]
+        raw_positions.extend(positions)
+        traders.extend([addr] * len(positions))
+    if not raw_positions:
+        return pd.DataFrame()
+    # json_normalize flattens the nested leverage object into dotted columns.
+    raw = pd.json_normalize(raw_positions).reindex(columns=POSITION_FIELDS)
+    trader = pd.Series(traders, index=raw.index)
+    positions_df = pd.DataFrame(
+        {
+            "label": trader.map(labels_by_address),
+            "trader": trader,
+            "coin": raw["coin"],
+            "size": _numeric(raw["szi"]),
+            "entry_px": _numeric(raw["entryPx"]),
+            "position_value": _numeric(raw["positionValue"]),
+            "unrealized_pnl": _numeric(raw["unrealizedPnl"]),
+            "return_on_equity": _numeric(raw["returnOnEquity"]),
+            "liquidation_px": _numeric(raw["liquidationPx"]),
+            "margin_used": _numeric(raw["marginUsed"]),
+            "leverage_type": raw["leverage.type"],
+            "leverage_value": _numeric(raw["leverage.value"]),
+        }
+    )
+    positions_df = positions_df[positions_df["size"] != 0]
+    if positions_df.empty:
+        return pd.DataFrame()
+    positions_df = _arrow_frame(_expand_labels(positions_df))
+    # Few distinct traders across many rows: sorting on category codes avoids
+    # repeated string comparisons.
+    positions_df["trader"] = positions_df["trader"].astype("category")
+    return positions_df.sort_values(by=["trader", "coin"], ascending=True, kind="stable")
+
+
+def _render_table(df: pd.DataFrame, key: str) -> None:
+    # AG Grid virtualises rows and paginates, so only the rows in view are in
+    # the DOM no matter how many fills are loaded. The grids are read-only:
+    # 1.0.x still defaults update_mode to MODEL_CHANGED and merges its events
+    # into update_on, so both are needed to keep browser-side sorting and
+    # filtering from rerunning the script.
+    builder = GridOptionsBuilder.from_dataframe(df)
+    builder.configure_default_column(resizable=True, sortable=True, filter=True)
+    builder.configure_pagination(paginationAutoPageSize=True)
+    AgGrid(
+        df,
+        gridOptions=builder.build(),
+        update_mode=GridUpdateMode.NO_UPDATE,
+        update_on=[],
+        enable_enterprise_modules=False,
+        theme="streamlit",
+        key=key,
+    )
+
+
+def _content_hash(*parts: Any) -> bytes:
+    encoded = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+def _memoized_frame(
+    name: str, digest: bytes, build: Callable[[], pd.DataFrame]
+) -> pd.DataFrame:
+    # Auto-refresh ticks mostly return unchanged data; reuse this session's
+    # previous frame instead of rebuilding it when the inputs hash the same.
+    last = st.session_state.setdefault("_last_hash", {})
+    cached = last.get(name)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    frame = build()
+    last[name] = (digest, frame)
+    return frame
+
+
+class _RateLimiter:
+    # Sliding-window weight budget. Each 429 halves the budget for the next
+    # window, compounding up to MAX_BACKOFF_LEVEL times while errors persist.
+    def __init__(self, weight_per_min: int) -> None:
+        self.lock = threading.Lock()
+        self.budget = weight_per_min
+        self.spent: Deque[Tuple[float, int]] = deque()
+        self.used = 0
+        self.backoff_level = 0
+        self.backoff_until = 0.0
+
+    def _expire(self, now: float) -> None:
+        while self.spent and now - self.spent[0][0] >= RATE_WINDOW_SECONDS:
+            self.used -= self.spent.popleft()[1]
+        if now >= self.backoff_until:
+            self.backoff_level = 0
+
+    def acquire(self, weight: int) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._expire(now)
+                limit = self.budget >> self.backoff_level
+                if not self.spent or self.used + weight <= limit:
+                    self.spent.append((now, weight))
+                    self.used += weight
+                    return
+                wait = self.spent[0][0] + RATE_WINDOW_SECONDS - now
+            # Re-check at least once a second in case a backoff expires.
+            time.sleep(min(max(wait, 0.05), 1.0))
+
+    def charge(self, weight: int) -> None:
+        if weight <= 0:
+            return
+        with self.lock:
+            self.spent.append((time.monotonic(), weight))
+            self.used += weight
+
+    def penalize(self) -> None:
+        with self.lock:
+            self.backoff_level = min(self.backoff_level + 1, MAX_BACKOFF_LEVEL)
+            self.backoff_until = time.monotonic() + RATE_WINDOW_SECONDS
+
+
+@st.cache_resource(show_spinner=False)
+def _rate_limiter() -> _RateLimiter:
+    return _RateLimiter(WEIGHT_BUDGET)
+
+
+def _request_weight(payload: Dict[str, Any]) -> int:
+    # userFillsByTime also costs one extra unit per 20 fills returned, which is
+    # charged once the response size is known.
+    if payload.get("type") == "clearinghouseState":
+        return 2
+    return 20
+
+
+class _Hyperliquid(ccxt.hyperliquid):
+    # Info responses for active traders run to tens of KB; decode them with
+    # orjson and leave anything it rejects to ccxt's own handling.
+    def parse_json(self, http_response: str) -> Any:
+        try:
+            return orjson.loads(http_response)
+        except orjson.JSONDecodeError:
+            return super().parse_json(http_response)
+
+
+@st.cache_resource(show_spinner=False)
+def _exchange_pool() -> "queue.LifoQueue[ccxt.Exchange]":
+    # ccxt clients are not thread-safe, so each one is checked out by a single
+    # worker at a time. The pool is shared by every session in this process,
+    # which also caps in-flight requests against the per-user limits.
+    pool: "queue.LifoQueue[ccxt.Exchange]" = queue.LifoQueue()
+    for _ in range(MAX_FETCH_WORKERS):
+        pool.put(_Hyperliquid({"enableRateLimit": True}))
+    return pool
+
+
+@contextmanager
+def _exchange() -> Iterator[ccxt.Exchange]:
+    exchange = _EXCHANGES.get()
+    try:
+        yield exchange
+    finally:
+        _EXCHANGES.put(exchange)
+
+
+def _public_info(exchange: ccxt.Exchange, payload: Dict[str, Any]) -> Any:
+    try:
+        if hasattr(exchange, "public_post_info"):
+            response = exchange.public_post_info(payload)
+        else:
+            response = exchange.request("info", "public", "POST", payload)
+    except ccxt.RateLimitExceeded:
+        _RATE_LIMITER.penalize()
+        raise
+    if payload.get("type") == "userFillsByTime" and isinstance(response, list):
+        _RATE_LIMITER.charge(len(response) // 20)
+    return response
+
+
+def _info(payload: Dict[str, Any]) -> Any:
+    # Wait for request budget before checking out a client, so throttled
+    # workers do not sit on pooled clients other sessions could use.
+    _RATE_LIMITER.acquire(_request_weight(payload))
+    with _exchange() as exchange:
+        return _public_info(exchange, payload)
+
+
+def _fetch_all(
+    fn: Callable[..., Any], args_list: Sequence[Tuple[Any, ...]]
+) -> Iterator[Tuple[Tuple[Any, ...], Any]]:
+    if not args_list:
+        return
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_FETCH_WORKERS, len(args_list)),
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    ) as executor:
+        futures = {executor.submit(fn, *args): args for args in args_list}
+        for future in as_completed(futures):
+            args = futures[future]
+            try:
+                yield args, future.result()
+            except Exception as exc:
+                yield args, exc
+
+
+class _SoftTTLStore:
+    # In-memory entries sit in front of a disk cache shared by every worker
+    # process, so a restart or a fresh session starts from the last response
+    # instead of a cold fetch.
+    def __init__(self, name: str, disk: diskcache.Cache) -> None:
+        self.name = name
+        self.disk = disk
+        self.lock = threading.Lock()
+        self.entries: Dict[Tuple[Any, ...], Tuple[Any, float]] = {}
+        self.refreshing: Set[Tuple[Any, ...]] = set()
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Tuple[Any, float]]:
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            entry = self.disk.get((self.name, *key))
+            if entry is not None:
+                with self.lock:
+                    entry = self.entries.setdefault(key, entry)
+        return entry
+
+    def put(self, key: Tuple[Any, ...], value: Any) -> None:
+        now = time.time()
+        with self.lock:
+            self.entries[key] = (value, now)
+            expired = [
+                k for k, (_, fetched_at) in self.entries.items()
+                if now - fetched_at > HARD_TTL_SECONDS
+            ]
+            for k in expired:
+                del self.entries[k]
+        self.disk.set(
+            (self.name, *key), (value, now), expire=HARD_TTL_SECONDS, tag=self.name
+        )
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+        self.disk.evict(self.name)
+
+    def revalidate(self, key: Tuple[Any, ...], loader: Callable[[], Any]) -> None:
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run() -> None:
+            try:
+                self.put(key, loader())
+            except Exception:
+                # Keep serving the last good value until it passes the hard TTL.
+                pass
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+@st.cache_resource(show_spinner=False)
+def _disk_cache() -> diskcache.Cache:
+    return diskcache.Cache(DISK_CACHE_DIR, tag_index=True)
+
+
+@st.cache_resource(show_spinner=False)
+def _soft_ttl_stores() -> Dict[str, _SoftTTLStore]:
+    return {}
+
+
+def _soft_ttl_store(name: str) -> _SoftTTLStore:
+    return _SOFT_TTL_STORES.get(name) or _SOFT_TTL_STORES.setdefault(
+        name, _SoftTTLStore(name, _DISK_CACHE)
+    )
+
+
+def soft_ttl_cache(func: Callable[..., Any]) -> Callable[..., Any]:
+    # Stale-while-revalidate: values younger than SOFT_TTL_SECONDS are served
+    # as-is, older ones are served while a background thread refreshes them,
+    # and only values past HARD_TTL_SECONDS (or missing) block the render.
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args: Any) -> Any:
+        store = _soft_ttl_store(name)
+        entry = store.get(args)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < SOFT_TTL_SECONDS:
+                return value
+            if age < HARD_TTL_SECONDS:
+                store.revalidate(args, lambda: func(*args))
+                return value
+        value = func(*args)
+        store.put(args, value)
+        return value
+
+    # Mirrors st.cache_data's per-function clear().
+    wrapper.clear = lambda: _soft_ttl_store(name).clear()  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _fill_time(fill: Dict[str, Any]) -> int:
+    try:
+        return int(float(fill.get("time") or fill.get("timestamp") or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _request_fills(
+    address: str, start_ms: int, end_ms: int, aggregate_by_time: bool
+) -> List[Dict[str, Any]]:
+    payload = {
+        "type": "userFillsByTime",
+        "user": address,
+        "startTime": start_ms,
+        "endTime": end_ms,
+        "aggregateByTime": aggregate_by_time,
+    }
+    return _info(payload) or []
+
+
+class _FillsTails:
+    # Per-trader fills already downloaded for the current window, so each poll
+    # only asks for fills newer than the last one seen.
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # (address, window_hours, aggregate_by_time) ->
+        #     (fills newest first, covered_from, last_ts, updated_at)
+        self.tails: Dict[
+            Tuple[str, int, bool], Tuple[List[Dict[str, Any]], int, int, float]
+        ] = {}
+
+    def get(
+        self, key: Tuple[str, int, bool]
+    ) -> Optional[Tuple[List[Dict[str, Any]], int, int, float]]:
+        with self.lock:
+            return self.tails.get(key)
+
+    def put(
+        self,
+        key: Tuple[str, int, bool],
+        fills: List[Dict[str, Any]],
+        covered_from: int,
+        last_ts: int,
+    ) -> None:
+        now = time.time()
+        with self.lock:
+            self.tails[key] = (fills, covered_from, last_ts, now)
+            stale = [
+                k for k, (*_, updated_at) in self.tails.items()
+                if now - updated_at > HARD_TTL_SECONDS
+            ]
+            for k in stale:
+                del self.tails[k]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.tails.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def _fills_tails() -> _FillsTails:
+    return _FillsTails()
+
+
+@soft_ttl_cache
+def fetch_recent_fills(
+    address: str, window_hours: int, aggregate_by_time: bool
+) -> List[Dict[str, Any]]:
+    end_ms = _utc_ms(datetime.now(tz=timezone.utc))
+    start_ms = end_ms - window_hours * 3600 * 1000
+    # Keyed by window too, so sessions watching different windows do not keep
+    # narrowing each other's coverage and forcing full refetches.
+    key = (address, window_hours, aggregate_by_time)
+    tail = _FILLS_TAILS.get(key)
+    if tail is not None and tail[1] <= start_ms:
+        cached, covered_from, last_ts, _ = tail
+        new_fills = _request_fills(address, last_ts + 1, end_ms, aggregate_by_time)
+    else:
+        cached, covered_from, last_ts = [], start_ms, start_ms - 1
+        new_fills = _request_fills(address, start_ms, end_ms, aggregate_by_time)
+    # Only the new fills need sorting: they are all newer than the cached tail,
+    # which is already newest first and capped, so the merge stays cheap.
+    merged = sorted(new_fills, key=_fill_time, reverse=True) + cached
+    while merged and _fill_time(merged[-1]) < start_ms:
+        merged.pop()
+    merged = merged[:MAX_FILLS_RETAINED]
+    if merged:
+        last_ts = max(last_ts, _fill_time(merged[0]))
+    _FILLS_TAILS.put(key, merged, max(covered_from, start_ms), last_ts)
+    return merged
+
+
+class _PositionsFeed:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # address -> last time any session asked for it; the feed is shared by
+        # every session, so each address expires on its own.
+        self.tracked: Dict[str, float] = {}
+        self.states: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self.thread: Optional[threading.Thread] = None
+
+    def track(self, addresses: Sequence[str]) -> None:
+        now = time.time()
+        with self.lock:
+            for addr in addresses:
+                self.tracked[addr.lower()] = now
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.states.get(address.lower())
+        if entry is None or time.time() - entry[1] > WS_STALE_SECONDS:
+            return None
+        return entry[0]
+
+    def _expire(self) -> None:
+        now = time.time()
+        for addr in [
+            addr for addr, tracked_at in self.tracked.items()
+            if now - tracked_at > HARD_TTL_SECONDS
+        ]:
+            del self.tracked[addr]
+
+    def _idle(self) -> bool:
+        with self.lock:
+            self._expire()
+            return not self.tracked
+
+    def _wanted(self, subscribed: Set[str]) -> Set[str]:
+        # Union of recently tracked addresses, capped at MAX_WS_USERS. Live
+        # subscriptions keep their slot so sessions with different wallets do
+        # not evict each other; free slots go to the longest-tracked addresses.
+        with self.lock:
+            self._expire()
+            wanted = [addr for addr in self.tracked if addr in subscribed]
+            wanted += [addr for addr in self.tracked if addr not in subscribed]
+        return set(wanted[:MAX_WS_USERS])
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._idle():
+            try:
+                self._stream()
+                backoff = 1.0
+            except Exception:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def _stream(self) -> None:
+        subscribed: Set[str] = set()
+        with ws_connect(HL_WS_URL, open_timeout=10) as ws:
+            last_seen = time.time()
+            while not self._idle():
+                wanted = self._wanted(subscribed)
+                for user in wanted - subscribed:
+                    ws.send(self._subscription("subscribe", user))
+                for user in subscribed - wanted:
+                    ws.send(self._subscription("unsubscribe", user))
+                    with self.lock:
+                        self.states.pop(user, None)
+                subscribed = wanted
+                try:
+                    raw = ws.recv(timeout=1)
+                except TimeoutError:
+                    if time.time() - last_seen > WS_PING_SECONDS:
+                        ws.send(json.dumps({"method": "ping"}))
+                        last_seen = time.time()
+                    continue
+                last_seen = time.time()
+                self._handle(orjson.loads(raw))
+
+    @staticmethod
+    def _subscription(method: str, user: str) -> str:
+        return json.dumps(
+            {"method": method, "subscription": {"type": "webData2", "user": user}}
+        )
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        if message.get("channel") != "webData2":
+            return
+        data = message.get("data") or {}
+        user = (data.get("user") or "").lower()
+        state = data.get("clearinghouseState")
+        if user and state is not None:
+            with self.lock:
+                self.states[user] = (state, time.time())
+
+
+@st.cache_resource(show_spinner=False)
+def _positions_feed() -> _PositionsFeed:
+    return _PositionsFeed()
+
+
+@soft_ttl_cache
+def fetch_positions_single(address: str) -> Dict[str, Any]:
+    payload = {
+        "type": "clearinghouseState",
+        "user": address,
+    }
+    return _info(payload)
+
+
+st.set_page_config(page_title=TITLE, layout="wide")
+
+# Resolved on the script thread; fetch workers only touch the returned objects.
+_EXCHANGES = _exchange_pool()
+_RATE_LIMITER = _rate_limiter()
+_DISK_CACHE = _disk_cache()
+_SOFT_TTL_STORES = _soft_ttl_stores()
+_POSITIONS_FEED = _positions_feed()
+_FILLS_TAILS = _fills_tails()
+
+st.title(TITLE)
+
+st.markdown(
+    "Read-only dashboard for recent fills (last 24 hours) and active positions of large traders."
 )
 
+# Emitted on every run: Streamlit drops any element a rerun does not re-emit,
+# so skipping this after the first run would unstyle the page. Being a
+# constant keeps the delta identical between reruns.
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
 st.sidebar.header("Inputs")
 
 if "wallet_entries" not in st.session_state:
@@ -180,12 +821,22 @@ upload = st.sidebar.file_uploader(
 
 if upload is not None:
     raw = upload.getvalue().decode("utf-8", errors="ignore")
-    tokens = []
-    for line in raw.splitlines():
-        for item in line.split(","):
-            val = item.strip()
-            if val:
-                tokens.append(val)
+    # Commas and newlines both separate addresses; folding them into one
+    # column keeps ragged rows from tripping the C parser's field count check.
+    # Quotes are stripped as plain text so an unbalanced one cannot fail the parse.
+    try:
+        parsed = pd.read_csv(
+            io.StringIO(raw.replace(",", "\n")),
+            header=None,
+            names=["address"],
+            dtype=str,
+            engine="c",
+            keep_default_na=False,
+            quoting=csv.QUOTE_NONE,
+        )["address"].str.strip().str.strip("\"'").str.strip()
+    except pd.errors.EmptyDataError:
+        parsed = pd.Series([], dtype=str)
+    tokens = parsed[parsed.str.len() > 0].tolist()
     for addr in tokens:
         st.session_state["wallet_entries"].append(
             {"label": f"Trader {len(st.session_state['wallet_entries']) + 1}", "address": addr}
@@ -195,7 +846,7 @@ if upload is not None:
 max_fills = st.sidebar.number_input(
     "Max fills per trader",
     min_value=10,
-    max_value=2000,
+    max_value=MAX_FILLS_RETAINED,
     value=200,
     step=10,
 )
@@ -223,24 +874,54 @@ refresh_seconds = st.sidebar.selectbox(
     index=3,
 )
 
+fills_columns = st.sidebar.multiselect(
+    "Fill columns",
+    options=FILLS_COLUMNS,
+    default=DEFAULT_FILLS_COLUMNS,
+)
+positions_columns = st.sidebar.multiselect(
+    "Position columns",
+    options=POSITIONS_COLUMNS,
+    default=DEFAULT_POSITIONS_COLUMNS,
+)
+
+
+def _visible_columns(selected: List[str], columns: List[str], default: List[str]) -> List[str]:
+    # Keep the table's canonical column order regardless of selection order.
+    return [col for col in columns if col in (selected or default)]
+
+
 def _parse_entries(entries: List[Dict[str, str]]) -> List[Dict[str, str]]:
     cleaned = []
     for item in entries:
-        addr = (item.get("address") or "").strip()
+        # Hyperliquid addresses are case-insensitive hex; normalise so the same
+        # wallet pasted twice is only fetched once.
+        addr = (item.get("address") or "").strip().lower()
         label = (item.get("label") or "").strip()
         if addr:
             cleaned.append({"address": addr, "label": label or addr})
     return cleaned
 
 entries = _parse_entries(st.session_state["wallet_entries"])
-addresses = [e["address"] for e in entries]
-labels_by_address = {e["address"]: e["label"] for e in entries}
+# A plain dict, not a defaultdict: Series.map only takes its vectorised
+# lookup path for mappings without __missing__.
+labels_by_address: Dict[str, List[str]] = {}
+for e in entries:
+    labels = labels_by_address.setdefault(e["address"], [])
+    # Repeated labels (e.g. two blank entries both falling back to the
+    # address) would otherwise duplicate every row for that wallet.
+    if e["label"] not in labels:
+        labels.append(e["label"])
+# Insertion-ordered keys: each wallet is fetched once, in sidebar order.
+addresses = list(labels_by_address)
 
 if auto_refresh and addresses:
     st_autorefresh(interval=refresh_seconds * 1000, key="auto_refresh")
 
 if refresh:
-    st.cache_data.clear()
+    fetch_recent_fills.clear()
+    fetch_positions_single.clear()
+    _FILLS_TAILS.clear()
 
 if not addresses:
     st.warning("Add at least one trader address in the sidebar to load data.")
@@ -248,8 +929,6 @@ if not addresses:
 
 end_dt = datetime.now(tz=timezone.utc)
 start_dt = end_dt - timedelta(hours=int(window_hours))
-start_ms = _utc_ms(start_dt)
-end_ms = _utc_ms(end_dt)
 
 summary_cols = st.columns(3)
 with summary_cols[0]:
@@ -288,45 +967,57 @@ st.caption(f"Window: {start_dt.isoformat()} to {end_dt.isoformat()} (UTC)")
 # Section 1: Recent fills
 st.subheader(f"Recent Fills (Last {window_hours} Hours)")
 
-fills_rows: List[Dict[str, Any]] = []
-for addr in addresses:
-    try:
-        fills = fetch_recent_fills(addr, start_ms, end_ms, aggregate_by_time) or []
-    except Exception as exc:
-        st.error(f"Failed to load fills for {addr}: {exc}")
+fills_by_address: Dict[str, List[Dict[str, Any]]] = {}
+for (addr, *_), fills in _fetch_all(
+    fetch_recent_fills,
+    [(addr, int(window_hours), aggregate_by_time) for addr in addresses],
+):
+    if isinstance(fills, Exception):
+        st.error(f"Failed to load fills for {addr}: {fills}")
         continue
+    fills_by_address[addr] = (fills or [])[: int(max_fills)]
 
-    for fill in fills[: int(max_fills)]:
-        ts = fill.get("time") or fill.get("timestamp")
-        ts_ms = _safe_float(ts) if ts is not None else float("nan")
-        dt = (
-            datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
-            if ts_ms == ts_ms
-            else None
+# Reassemble in sidebar order so the content hash does not depend on which
+# request happened to finish first.
+raw_fills: List[Dict[str, Any]] = []
+fill_traders: List[str] = []
+for addr in addresses:
+    fills = fills_by_address.get(addr, [])
+    raw_fills.extend(fills)
+    fill_traders.extend([addr] * len(fills))
+
+if raw_fills:
+    fills_df = _memoized_frame(
+        "fills",
+        _content_hash(raw_fills, fill_traders, labels_by_address),
+        lambda: _build_fills_df(
+            raw_fills, fill_traders, labels_by_address
+        ).sort_values(by="time", ascending=False, kind="stable"),
+    )
+    fills_df = fills_df.loc[
+        :, _visible_columns(fills_columns, FILLS_COLUMNS, DEFAULT_FILLS_COLUMNS)
+    ]
+    if len(fills_df) > 2 * PREVIEW_ROWS:
+        show_all_fills = st.checkbox(
+            "Show all fills",
+            value=False,
+            key="show_all_fills",
+            help=(
+                f"{len(fills_df)} fills loaded; only the newest and oldest "
+                f"{PREVIEW_ROWS} are sent by default."
+            ),
         )
-        px = _safe_float(fill.get("px"))
-        sz = _safe_float(fill.get("sz"))
-        fills_rows.append(
-            {
-                "time": dt.isoformat() if dt else "",
-                "label": labels_by_address.get(addr, addr),
-                "trader": addr,
-                "coin": fill.get("coin"),
-                "side": fill.get("side"),
-                "dir": fill.get("dir"),
-                "price": px,
-                "size": sz,
-                "notional": px * sz if px == px and sz == sz else float("nan"),
-                "closed_pnl": _safe_float(fill.get("closedPnl")),
-                "fee": _safe_float(fill.get("fee")),
-                "liquidation": fill.get("liquidation"),
-            }
+        if not show_all_fills:
+            fills_df = pd.concat(
+                [fills_df.head(PREVIEW_ROWS), fills_df.tail(PREVIEW_ROWS)]
+            )
+    if "time" in fills_df.columns:
+        # Format only the rows actually being sent, after slicing. pyarrow's
+        # strftime appends fractional seconds to %S, so format via numpy.
+        fills_df = fills_df.assign(
+            time=fills_df["time"].astype("datetime64[ns, UTC]").dt.strftime(TIME_FORMAT)
         )
-
-if fills_rows:
-    fills_df = pd.DataFrame(fills_rows)
-    fills_df = fills_df.sort_values(by="time", ascending=False)
-    st.dataframe(fills_df, use_container_width=True, hide_index=True)
+    _render_table(fills_df, key="fills_grid")
 else:
     st.info(
         f"No fills found in the last {window_hours} hours for the provided addresses."
@@ -335,41 +1026,40 @@ else:
 # Section 2: Active positions
 st.subheader("Active Positions")
 
-positions_rows: List[Dict[str, Any]] = []
+# Streamed clearinghouse states cover up to MAX_WS_USERS traders across all
+# sessions; the rest, and any trader whose stream has not delivered yet, fall
+# back to REST.
+_POSITIONS_FEED.track(addresses)
+streamed_states = [((addr,), _POSITIONS_FEED.get(addr)) for addr in addresses]
+rest_addresses = [(addr,) for (addr,), state in streamed_states if state is None]
 
-for addr in addresses:
-    try:
-        state = fetch_positions_single(addr)
-    except Exception as exc:
-        st.error(f"Failed to load positions for {addr}: {exc}")
+states_by_address: Dict[str, Dict[str, Any]] = {}
+for (addr,), state in itertools.chain(
+    [item for item in streamed_states if item[1] is not None],
+    _fetch_all(fetch_positions_single, rest_addresses),
+):
+    if isinstance(state, Exception):
+        st.error(f"Failed to load positions for {addr}: {state}")
         continue
-    asset_positions = (state or {}).get("assetPositions") or []
-    for ap in asset_positions:
-        pos = ap.get("position", {})
-        szi = _safe_float(pos.get("szi"))
-        if szi == 0:
-            continue
-        positions_rows.append(
-            {
-                "label": labels_by_address.get(addr, addr),
-                "trader": addr,
-                "coin": pos.get("coin"),
-                "size": szi,
-                "entry_px": _safe_float(pos.get("entryPx")),
-                "position_value": _safe_float(pos.get("positionValue")),
-                "unrealized_pnl": _safe_float(pos.get("unrealizedPnl")),
-                "return_on_equity": _safe_float(pos.get("returnOnEquity")),
-                "liquidation_px": _safe_float(pos.get("liquidationPx")),
-                "margin_used": _safe_float(pos.get("marginUsed")),
-                "leverage_type": pos.get("leverage", {}).get("type"),
-                "leverage_value": _safe_float(pos.get("leverage", {}).get("value")),
-            }
-        )
+    states_by_address[addr] = state or {}
 
-if positions_rows:
-    positions_df = pd.DataFrame(positions_rows)
-    positions_df = positions_df.sort_values(by=["trader", "coin"], ascending=True)
-    st.dataframe(positions_df, use_container_width=True, hide_index=True)
+position_states = [
+    (addr, states_by_address[addr]) for addr in addresses if addr in states_by_address
+]
+positions_df = _memoized_frame(
+    "positions",
+    _content_hash(position_states, labels_by_address),
+    lambda: _build_positions_df(position_states, labels_by_address),
+)
+
+if not positions_df.empty:
+    positions_df = positions_df.loc[
+        :,
+        _visible_columns(
+            positions_columns, POSITIONS_COLUMNS, DEFAULT_POSITIONS_COLUMNS
+        ),
+    ]
+    _render_table(positions_df, key="positions_grid")
 else:
     st.info("No active positions found for the provided addresses.")
 